@@ -48,110 +48,164 @@ with st.expander("🔎 Need more detailed help? Click here"):
 
 # Continue with your main app logic below...
 
+import hashlib
 import pandas as pd
 import numpy as np
-import plotly.express as px
+import plotly.graph_objects as go
 from io import BytesIO
 
-# Function to load spreadsheet
-def load_spreadsheet(uploaded_file):
-    if uploaded_file.name.endswith('.csv'):
-        return {'Sheet1': pd.read_csv(uploaded_file)}
-    else:
-        return pd.read_excel(uploaded_file, sheet_name=None)
+# polars and plotly.express are imported inside the functions that use them, so the first page
+# with the file uploader renders without waiting on them (numpy and plotly.graph_objects are
+# already loaded by pandas and Streamlit)
 
-# Function to clean the data
-def clean_data(df):
-    # Replace '<' followed by a number with 0
-    df = df.applymap(lambda x: 0 if isinstance(x, str) and x.strip().startswith('<') else x)
+# Cached functions are keyed on a digest of the upload (file_key) computed once per rerun;
+# the leading underscore stops Streamlit from hashing the raw bytes or arrays themselves
 
-    # Replace blanks (NaN) with 0
-    df = df.fillna(0)
+# Function to list the sheets in a spreadsheet without parsing their contents
+@st.cache_data(max_entries=16, ttl=3600)
+def list_sheets(file_key, _file_bytes, name):
+    if name.endswith('.csv'):
+        return ['Sheet1']
+    else:
+        return pd.ExcelFile(BytesIO(_file_bytes), engine='calamine').sheet_names
+
+# Function to load a single sheet (cached on the file key so reruns skip parsing)
+@st.cache_data(show_spinner="Parsing spreadsheet…", max_entries=16, ttl=3600)
+def read_sheet(file_key, _file_bytes, name, sheet_name):
+    if name.endswith('.csv'):
+        import polars as pl
+        # Read every column as text: a column can look integer early on and hold '<0.5' later,
+        # and clean_data converts the values to numbers anyway
+        return pl.read_csv(BytesIO(_file_bytes), infer_schema_length=0).to_pandas()
+    else:
+        return pd.read_excel(BytesIO(_file_bytes), sheet_name=sheet_name, engine='calamine')
 
-    # Assume first column is parameter name
-    parameters = df.iloc[:, 0]
+# Function to clean the data (keyed on file + sheet so pandas never hashes the frame)
+@st.cache_data(show_spinner="Cleaning data…", max_entries=16, ttl=3600)
+def clean_data(file_key, _file_bytes, name, sheet_name):
+    df = read_sheet(file_key, _file_bytes, name, sheet_name)
 
-    # Assume first row is dates
-    dates = df.columns[1:]
+    # Convert values to numbers and replace blanks (NaN) with 0 in one pass; values such as
+    # '<0.1' do not parse as numbers, so they are coerced to NaN and become 0 here as well
+    numeric = df.iloc[:, 1:].apply(pd.to_numeric, errors='coerce').fillna(0)
+    df = pd.concat([df.iloc[:, :1], numeric], axis=1)
 
-    # Create a new DataFrame with cleaned structure
-    cleaned_df = pd.DataFrame(df.iloc[:, 1:].values, columns=dates)
-    cleaned_df.insert(0, 'Parameter', parameters)
+    # Assume first column is parameter name and first row is dates; relabel in place
+    # (by position, in case a date header matches the first header) rather than copying
+    df.columns = ['Parameter', *df.columns[1:]]
+    cleaned_df = df
 
     # Handle duplicate dates
     if cleaned_df.columns.duplicated().any():
-        duplicated_dates = cleaned_df.columns[1:][cleaned_df.columns.duplicated()[1:]]
-        for date in duplicated_dates.unique():
-            cols = cleaned_df.filter(regex=f"^{date}$").columns
-            cleaned_df[date] = cleaned_df[cols].mean(axis=1)
-            cleaned_df = cleaned_df.drop(columns=[col for col in cols if col != date])
+        values_part = cleaned_df.drop(columns='Parameter')
+        merged = values_part.T.groupby(level=0, sort=False).mean().T
+        cleaned_df = pd.concat([cleaned_df[['Parameter']], merged], axis=1)
 
     # Handle duplicate parameters
     if cleaned_df['Parameter'].duplicated().any():
-        duplicated_params = cleaned_df['Parameter'][cleaned_df['Parameter'].duplicated()].unique()
-        for param in duplicated_params:
-            param_rows = cleaned_df[cleaned_df['Parameter'] == param]
-            mean_values = param_rows.iloc[:, 1:].mean(axis=0)
-            first_index = param_rows.index[0]
-            cleaned_df.loc[first_index, cleaned_df.columns[1:]] = mean_values
-            cleaned_df = cleaned_df.drop(param_rows.index[1:])
+        cleaned_df = cleaned_df.groupby('Parameter', sort=False, as_index=False, dropna=False).mean()
 
     # Reset index for neatness
     cleaned_df = cleaned_df.reset_index(drop=True)
-    
-    return cleaned_df
+
+    # Parse the date headers once here so no plot has to re-parse them on a rerun: ISO dates (and
+    # dates read from Excel) first, then slash-style headers day first as the instructions ask;
+    # anything else becomes NaT. The frame keeps its original headers, as several unparseable
+    # ones would give duplicate NaT labels
+    headers = cleaned_df.columns[1:].astype(str)
+    dates = pd.to_datetime(headers, format='ISO8601', errors='coerce')
+    slash = dates.isna() & headers.str.contains('/', regex=False)
+    if slash.any():
+        dates = dates.where(~slash, pd.to_datetime(headers.where(slash), dayfirst=True, errors='coerce'))
+
+    # Split into parameter names, sampling dates and a contiguous float32 value block
+    # (parameters x dates) so the plots work on NumPy slices instead of reshaping the frame
+    params = cleaned_df['Parameter'].to_numpy()
+    values = np.ascontiguousarray(cleaned_df.iloc[:, 1:].to_numpy(dtype=np.float32))
+    # Parameter names are unique after merging, so each maps to exactly one row of the block
+    name_to_row = {p: i for i, p in enumerate(params)}
+    # Ordered parameter list for the selectors, built once and cached with the data
+    parameters = tuple(pd.unique(params))
+
+    return cleaned_df, parameters, dates, values, name_to_row
+
+# Figure builders are cached per data_key (file, sheet) and selection, so re-selecting
+# parameters reuses the built figure; the caches are shared by all sessions, so every cache
+# here is bounded in size and age to keep server memory in check
 
 # Scatter plot function
-def scatter_plot(data, param_x, param_y):
-    # Ensure data contains numeric values for the selected parameters
-    data = data[[param_x, param_y]].dropna().astype(float)
-    fig = px.scatter(
-        data_frame=data,
-        x=param_x,
-        y=param_y,
+@st.cache_resource(max_entries=32, ttl=3600)
+def _build_scatter_fig(data_key, param_x, param_y, _x, _y):
+    import plotly.express as px
+    return px.scatter(
+        x=_x,
+        y=_y,
         labels={'x': param_x, 'y': param_y},
+        render_mode='webgl',  # Rasterise points on the GPU rather than as SVG nodes
         title=f'Scatter Plot of {param_x} vs {param_y}'
     )
-    st.plotly_chart(fig)
+
+def scatter_plot(data_key, name_to_row, values, param_x, param_y):
+    x = values[name_to_row[param_x]]
+    y = values[name_to_row[param_y]]
+    st.plotly_chart(_build_scatter_fig(data_key, param_x, param_y, x, y))
 
 # Time series line chart function
-def time_series_plot(data, selected_params):
-    # Ensure Sampling Date is properly formatted as datetime
-    data = data.melt(id_vars='Parameter', var_name='Sampling Date', value_name='Value')
-    data['Sampling Date'] = pd.to_datetime(data['Sampling Date'], errors='coerce')
-    data = data.dropna(subset=['Sampling Date', 'Value'])
-    fig = px.line(
-        data_frame=data[data['Parameter'].isin(selected_params)],
-        x='Sampling Date',
-        y='Value',
-        color='Parameter',
-        labels={'Value': 'Parameter Value', 'Sampling Date': 'Sampling Date'},
-        title='Time Series of Parameters over Time'
+@st.cache_resource(max_entries=32, ttl=3600)
+def _build_ts_fig(data_key, sig, _dates, _block):
+    # Keep the parseable sampling dates in chronological order so the lines run left to right
+    valid = np.flatnonzero(_dates.notna())
+    order = valid[_dates[valid].argsort()]
+    x = _dates[order]
+    # One WebGL trace per selected parameter straight from its row of the value block
+    fig = go.Figure()
+    for param, row in zip(sig, _block):
+        fig.add_trace(go.Scattergl(x=x, y=row[order], mode='lines', name=str(param)))
+    fig.update_layout(
+        title='Time Series of Parameters over Time',
+        xaxis_title='Sampling Date',
+        yaxis_title='Parameter Value',
+        legend_title_text='Parameters'
     )
     fig.update_xaxes(
         tickformat="%b %Y",  # Display months and years
         dtick="M1"          # Set tick interval to monthly
     )
-    fig.update_layout(legend_title_text='Parameters')
-    st.plotly_chart(fig)
+    return fig
+
+def time_series_plot(data_key, name_to_row, dates, values, selected_params):
+    rows = [name_to_row[param] for param in selected_params]
+    st.plotly_chart(_build_ts_fig(data_key, tuple(selected_params), dates, values[rows]))
 
 # Ratio plot function
-def ratio_plot(data, numerator, denominator):
-    # Ensure data contains numeric values for the selected parameters
-    ratio_data = data.set_index('Parameter').T
-    ratio_data = ratio_data[[numerator, denominator]].dropna().astype(float)
-    ratio = ratio_data[numerator] / ratio_data[denominator].replace(0, np.nan)
-    fig = px.line(
+@st.cache_resource(max_entries=32, ttl=3600)
+def _build_ratio_fig(data_key, numerator, denominator, _dates, _num, _den):
+    # Divide in a single pass, leaving NaN where the denominator is zero
+    out = np.full_like(_num, np.nan)
+    np.divide(_num, _den, out=out, where=_den != 0)
+    ratio = pd.Series(out, index=_dates)
+    ratio = ratio[ratio.index.notna()].sort_index()
+    fig = go.Figure(go.Scattergl(
         x=ratio.index,
-        y=ratio.values,
-        labels={'x': 'Sampling Date', 'y': f'{numerator} / {denominator} Ratio'},
-        title=f'Ratio of {numerator} to {denominator} over Time'
+        y=ratio.to_numpy(),
+        mode='lines',
+        name=f'{numerator} / {denominator}'
+    ))
+    fig.update_layout(
+        title=f'Ratio of {numerator} to {denominator} over Time',
+        xaxis_title='Sampling Date',
+        yaxis_title=f'{numerator} / {denominator} Ratio'
     )
     fig.update_xaxes(
         tickformat="%b %Y",  # Display months and years
         dtick="M1"          # Set tick interval to monthly
     )
-    st.plotly_chart(fig)
+    return fig
+
+def ratio_plot(data_key, name_to_row, dates, values, numerator, denominator):
+    num = values[name_to_row[numerator]]
+    den = values[name_to_row[denominator]]
+    st.plotly_chart(_build_ratio_fig(data_key, numerator, denominator, dates, num, den))
 
 # Streamlit app layout
 st.title("Brine Data Visualiser")
@@ -159,14 +213,16 @@ st.title("Brine Data Visualiser")
 uploaded_file = st.file_uploader("Upload your Spreadsheet (.csv, .xls, .xlsx)", type=['csv', 'xls', 'xlsx'])
 
 if uploaded_file:
-    sheets = load_spreadsheet(uploaded_file)
-    sheet_name = st.selectbox("Select Sheet to Load", list(sheets.keys()))
-    df = sheets[sheet_name]
+    raw = uploaded_file.getvalue()
+    file_key = hashlib.sha1(raw).hexdigest()
+    sheet_name = st.selectbox("Select Sheet to Load", list_sheets(file_key, raw, uploaded_file.name))
+    df = read_sheet(file_key, raw, uploaded_file.name, sheet_name)
     
     st.subheader("Raw Data Preview")
     st.dataframe(df)
 
-    cleaned_df = clean_data(df)
+    cleaned_df, parameters, dates, values, name_to_row = clean_data(file_key, raw, uploaded_file.name, sheet_name)
+    data_key = (file_key, uploaded_file.name, sheet_name)
 
     st.subheader("Cleaned Data Preview")
     st.dataframe(cleaned_df)
@@ -174,26 +230,39 @@ if uploaded_file:
     st.markdown("---")
     st.header("Visualisations")
 
-    parameters = cleaned_df['Parameter'].unique().tolist()
+    # Each chart's controls sit in a form so widget changes are applied together on submit;
+    # a chart stays on screen once plotted, using the selection from its last submit, until a
+    # different file or sheet is loaded
+    if st.session_state.get('data_key') != data_key:
+        st.session_state['data_key'] = data_key
+        for flag in ('scatter_plotted', 'time_series_plotted', 'ratio_plotted'):
+            st.session_state.pop(flag, None)
 
     # Scatter Plot
     st.subheader("Scatter Plot Between Two Parameters")
-    param_x = st.selectbox("Select X-axis Parameter", parameters, key='scatter_x')
-    param_y = st.selectbox("Select Y-axis Parameter", parameters, key='scatter_y')
-    scatter_data = cleaned_df.set_index('Parameter').T
-    scatter_plot(scatter_data, param_x, param_y)
+    with st.form('scatter_form'):
+        param_x = st.selectbox("Select X-axis Parameter", parameters, key='scatter_x')
+        param_y = st.selectbox("Select Y-axis Parameter", parameters, key='scatter_y')
+        if st.form_submit_button("Plot"):
+            st.session_state['scatter_plotted'] = True
+    if st.session_state.get('scatter_plotted'):
+        scatter_plot(data_key, name_to_row, values, param_x, param_y)
 
     # Time Series Line Chart
     st.subheader("Time Series Line Chart")
-    selected_params = st.multiselect("Select Parameters for Time Series Plot", parameters, key='time_series_params')
-    if selected_params:
-        ts_data = cleaned_df[cleaned_df['Parameter'].isin(selected_params)]
-        time_series_plot(ts_data, selected_params)
+    with st.form('time_series_form'):
+        selected_params = st.multiselect("Select Parameters for Time Series Plot", parameters, key='time_series_params')
+        if st.form_submit_button("Plot"):
+            st.session_state['time_series_plotted'] = True
+    if st.session_state.get('time_series_plotted') and selected_params:
+        time_series_plot(data_key, name_to_row, dates, values, selected_params)
 
     # Ratio Plot
     st.subheader("Ratio Plot Between Two Parameters")
-    numerator = st.selectbox("Select Numerator Parameter", parameters, key='ratio_num')
-    denominator = st.selectbox("Select Denominator Parameter", parameters, key='ratio_den')
-    ratio_data = cleaned_df
-    ratio_plot(ratio_data, numerator, denominator)
-
+    with st.form('ratio_form'):
+        numerator = st.selectbox("Select Numerator Parameter", parameters, key='ratio_num')
+        denominator = st.selectbox("Select Denominator Parameter", parameters, key='ratio_den')
+        if st.form_submit_button("Plot"):
+            st.session_state['ratio_plotted'] = True
+    if st.session_state.get('ratio_plotted'):
+        ratio_plot(data_key, name_to_row, dates, values, numerator, denominator)